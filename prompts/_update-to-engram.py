@@ -9,13 +9,61 @@ to include engram integration patterns.
 import os
 import re
 import json
+import mmap
+import shutil
+import hashlib
+import contextlib
 import yaml
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Optional
 
+# Prefer the libyaml-backed loader/dumper; fall back to pure Python if
+# PyYAML was built without libyaml. File content is handed to the loader as
+# bytes: the C parser reads a bytes object in place, while a file-like
+# buffer (e.g. a reused BytesIO) is pulled through Python-level read() calls
+# and measures slower.
+try:
+    from yaml import CSafeLoader as Loader, CSafeDumper as Dumper
+except ImportError:
+    from yaml import SafeLoader as Loader, SafeDumper as Dumper
+
+
+# Markers written by this script; a file containing both has already been
+# converted and can be skipped without parsing it.
+ADAPTED_MARKERS = (b"(Engram-Adapted)", b"ENGRAM INTEGRATION")
+
+# Sidecar file recording (size, mtime) of files already adapted, so reruns
+# can skip them with a single stat call.
+CACHE_FILENAME = ".engram-adapted.cache.json"
+
+# Bump whenever the transformation rules change (new fields, different
+# checks), so signatures cached under the old rules are discarded. Changes to
+# the injected text blocks are picked up automatically by rules_key().
+RULES_VERSION = 1
+
+# Files at least this large are scanned for the markers via mmap.
+MMAP_THRESHOLD = 16 * 4096
 
-def add_engram_instructions(original_instructions: str) -> str:
-    """Add engram integration instructions to agent."""
-    engram_prefix = """ENGRAM INTEGRATION - YOU MUST:
+
+# Buffer size used when writing adapted files back out.
+WRITE_BUFFER_SIZE = 64 * 1024
+
+# Below this many files to process, hashing for duplicates costs more than
+# it saves.
+DEDUP_THRESHOLD = 32
+
+# Outcomes reported by process_agent_file/process_pipeline_file. Only files
+# that were processed without error are recorded in the cache.
+UPDATED = "updated"
+UNCHANGED = "unchanged"
+FAILED = "failed"
+
+# Case-insensitive "engram" check that avoids building a lowercased copy.
+ENGRAM_RE = re.compile(r"engram", re.IGNORECASE)
+
+# Text blocks injected into agent and pipeline files.
+ENGRAM_AGENT_PREFIX = """ENGRAM INTEGRATION - YOU MUST:
 
 1. BEFORE WORK:
    ```bash
@@ -36,16 +84,75 @@ def add_engram_instructions(original_instructions: str) -> str:
    ```
 
 """
+
+ENGRAM_PROMPT_SUFFIX = """
+
+ENGRAM WORKFLOW:
+1. Get task: `engram task show {{task_id}}`
+2. Get context: `engram relationship connected --entity-id {{task_id}} --references`
+3. Store progress: `engram reasoning create --title "[Progress]" --task-id {{task_id}} --content "[What you did]"`
+4. Store result: `engram context create --title "[Result]" --content "[Output]"`
+5. Complete: `engram task update {{task_id}} --status done --outcome "[Summary]"`
+
+Return JSON with task_id, status, and result_summary.
+"""
+
+ENGRAM_PIPELINE_INSTRUCTIONS = """
+ENGRAM INTEGRATION:
+- Create engram workflow for orchestration
+- Use engram tasks for each stage
+- Track progress via engram workflow status
+- Store all outputs in engram entities
+
+"""
+
+
+def read_unless_adapted(filepath: Path) -> Optional[bytes]:
+    """Read a file, or return None if it carries the markers of a previous run.
     
+    Files at or above MMAP_THRESHOLD are scanned through mmap first, so an
+    adapted file is rejected without copying it into memory; smaller files
+    are read once and the same bytes are checked and returned for parsing.
+    """
+    with open(filepath, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if all(mm.find(marker) != -1 for marker in ADAPTED_MARKERS):
+                    return None
+            return f.read()
+        content = f.read()
+    if all(marker in content for marker in ADAPTED_MARKERS):
+        return None
+    return content
+
+
+def add_engram_instructions(original_instructions: str) -> str:
+    """Add engram integration instructions to agent."""
     # Check if already has engram integration
-    if "engram" in original_instructions.lower():
+    if ENGRAM_RE.search(original_instructions):
         return original_instructions
     
-    return engram_prefix + original_instructions
+    return ENGRAM_AGENT_PREFIX + original_instructions
 
 
-def update_agent_parameters(parameters: dict) -> dict:
-    """Update parameters to include task_id."""
+def add_required(required: list, *names: str) -> bool:
+    """Append names missing from a required list, keeping existing order.
+    
+    Returns True if the list grew.
+    """
+    present = set(required)
+    missing = [name for name in names if name not in present]
+    required.extend(missing)
+    return bool(missing)
+
+
+def update_agent_parameters(parameters: dict) -> bool:
+    """Update parameters in place to include task_id.
+    
+    Returns True if anything was added.
+    """
+    changed = False
     # Add task_id parameter if not exists
     if "properties" in parameters:
         if "task_id" not in parameters["properties"]:
@@ -53,33 +160,27 @@ def update_agent_parameters(parameters: dict) -> dict:
                 "type": "string",
                 "description": "The engram task ID for this work"
             }
-        if "required" in parameters and "task_id" not in parameters["required"]:
-            parameters["required"].append("task_id")
-    return parameters
+            changed = True
+        if "required" in parameters:
+            if add_required(parameters["required"], "task_id"):
+                changed = True
+    return changed
 
 
 def update_agent_prompt(prompt: str) -> str:
     """Update prompt to include engram workflow steps."""
-    engram_prompt_addition = """
-
-ENGRAM WORKFLOW:
-1. Get task: `engram task show {{task_id}}`
-2. Get context: `engram relationship connected --entity-id {{task_id}} --references`
-3. Store progress: `engram reasoning create --title "[Progress]" --task-id {{task_id}} --content "[What you did]"`
-4. Store result: `engram context create --title "[Result]" --content "[Output]"`
-5. Complete: `engram task update {{task_id}} --status done --outcome "[Summary]"`
-
-Return JSON with task_id, status, and result_summary.
-"""
-    
-    if "engram" in prompt.lower():
+    if ENGRAM_RE.search(prompt):
         return prompt
     
-    return prompt + engram_prompt_addition
+    return prompt + ENGRAM_PROMPT_SUFFIX
 
 
-def update_response_schema(response: dict) -> dict:
-    """Update response to include engram fields."""
+def update_response_schema(response: dict) -> bool:
+    """Update response in place to include engram fields.
+    
+    Returns True if anything was added.
+    """
+    changed = False
     if "schema" in response and "properties" in response["schema"]:
         schema = response["schema"]["properties"]
         
@@ -89,32 +190,75 @@ def update_response_schema(response: dict) -> dict:
                 "type": "string",
                 "description": "The task ID (echoed for confirmation)"
             }
+            changed = True
         if "status" not in schema:
             schema["status"] = {
                 "type": "string",
                 "description": "Status of work completion"
             }
+            changed = True
         
         # Update required fields
         if "required" in response["schema"]:
-            if "task_id" not in response["schema"]["required"]:
-                response["schema"]["required"].append("task_id")
-            if "status" not in response["schema"]["required"]:
-                response["schema"]["required"].append("status")
+            if add_required(response["schema"]["required"], "task_id", "status"):
+                changed = True
+    
+    return changed
+
+
+@contextlib.contextmanager
+def atomic_replace(filepath: Path):
+    """Yield a sibling temp path that replaces filepath once the block exits.
     
-    return response
+    Symlinks are resolved so the link target is rewritten and the link kept,
+    and the original file's permissions are copied onto the replacement. The
+    temp file is removed if the block fails.
+    """
+    target = filepath.resolve()
+    tmp_path = target.with_suffix(target.suffix + ".tmp")
+    try:
+        yield tmp_path
+        shutil.copymode(target, tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def copy_file(src: Path, dst: Path) -> None:
+    """Copy src over dst atomically, keeping dst's permissions."""
+    with atomic_replace(dst) as tmp_path:
+        shutil.copyfile(src, tmp_path)
+
+
+def write_yaml(filepath: Path, data: dict) -> None:
+    """Dump data to a YAML file, replacing it atomically.
+    
+    The dumper emits straight into a sibling temp file, so the document is
+    never built up as one string, and os.replace() swaps it in so a crash
+    never leaves a truncated file behind.
+    """
+    with atomic_replace(filepath) as tmp_path:
+        with open(tmp_path, 'w', buffering=WRITE_BUFFER_SIZE) as f:
+            yaml.dump(data, f, Dumper=Dumper, default_flow_style=False, sort_keys=False)
 
 
-def process_agent_file(filepath: Path) -> bool:
-    """Process a single agent YAML file."""
+def process_agent_file(filepath: Path) -> tuple:
+    """Process a single agent YAML file.
+    
+    Returns (status, error) where status is UPDATED, UNCHANGED or FAILED and
+    error describes the failure.
+    """
     try:
-        with open(filepath, 'r') as f:
-            content = f.read()
+        # Skip files converted by a previous run before paying for a parse
+        content = read_unless_adapted(filepath)
+        if content is None:
+            return UNCHANGED, None
         
         # Parse YAML
-        data = yaml.safe_load(content)
+        data = yaml.load(content, Loader=Loader)
         if not data:
-            return False
+            return UNCHANGED, None
         
         # Track changes
         changed = False
@@ -128,9 +272,7 @@ def process_agent_file(filepath: Path) -> bool:
         
         # Update parameters
         if "parameters" in data:
-            original = str(data["parameters"])
-            data["parameters"] = update_agent_parameters(data["parameters"])
-            if str(data["parameters"]) != original:
+            if update_agent_parameters(data["parameters"]):
                 changed = True
         
         # Update prompt
@@ -142,9 +284,7 @@ def process_agent_file(filepath: Path) -> bool:
         
         # Update response
         if "response" in data:
-            original = str(data["response"])
-            data["response"] = update_response_schema(data["response"])
-            if str(data["response"]) != original:
+            if update_response_schema(data["response"]):
                 changed = True
         
         # Update title
@@ -154,26 +294,30 @@ def process_agent_file(filepath: Path) -> bool:
         
         # Write back if changed
         if changed:
-            with open(filepath, 'w') as f:
-                yaml.dump(data, f, default_flow_style=False, sort_keys=False)
-            return True
+            write_yaml(filepath, data)
+            return UPDATED, None
         
-        return False
+        return UNCHANGED, None
     
     except Exception as e:
-        print(f"Error processing {filepath}: {e}")
-        return False
+        return FAILED, str(e)
 
 
-def process_pipeline_file(filepath: Path) -> bool:
-    """Process a single pipeline YAML file."""
+def process_pipeline_file(filepath: Path) -> tuple:
+    """Process a single pipeline YAML file.
+    
+    Returns (status, error) where status is UPDATED, UNCHANGED or FAILED and
+    error describes the failure.
+    """
     try:
-        with open(filepath, 'r') as f:
-            content = f.read()
+        # Skip files converted by a previous run before paying for a parse
+        content = read_unless_adapted(filepath)
+        if content is None:
+            return UNCHANGED, None
         
-        data = yaml.safe_load(content)
+        data = yaml.load(content, Loader=Loader)
         if not data:
-            return False
+            return UNCHANGED, None
         
         changed = False
         
@@ -184,16 +328,8 @@ def process_pipeline_file(filepath: Path) -> bool:
         
         # Update instructions
         if "instructions" in data:
-            if "engram" not in data["instructions"].lower():
-                engram_instr = """
-ENGRAM INTEGRATION:
-- Create engram workflow for orchestration
-- Use engram tasks for each stage
-- Track progress via engram workflow status
-- Store all outputs in engram entities
-
-"""
-                data["instructions"] = engram_instr + data["instructions"]
+            if not ENGRAM_RE.search(data["instructions"]):
+                data["instructions"] = ENGRAM_PIPELINE_INSTRUCTIONS + data["instructions"]
                 changed = True
         
         # Update parameters
@@ -216,50 +352,154 @@ ENGRAM INTEGRATION:
                     changed = True
         
         if changed:
-            with open(filepath, 'w') as f:
-                yaml.dump(data, f, default_flow_style=False, sort_keys=False)
-            return True
+            write_yaml(filepath, data)
+            return UPDATED, None
         
-        return False
+        return UNCHANGED, None
     
     except Exception as e:
-        print(f"Error processing {filepath}: {e}")
-        return False
+        return FAILED, str(e)
+
+
+def file_signature(filepath: Path) -> list:
+    """Return the (size, mtime) signature used to detect unchanged files."""
+    st = filepath.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+def rules_key() -> str:
+    """Fingerprint the transformation rules the cache was built under."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (str(RULES_VERSION), ENGRAM_AGENT_PREFIX, ENGRAM_PROMPT_SUFFIX,
+                 ENGRAM_PIPELINE_INSTRUCTIONS):
+        digest.update(part.encode() + b"\0")
+    return digest.hexdigest()
+
+
+def load_cache(cache_path: Path) -> dict:
+    """Load signatures of files processed by previous runs.
+    
+    The cache is discarded if it was written under different rules.
+    """
+    try:
+        data = json.loads(cache_path.read_text())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("rules") != rules_key():
+        return {}
+    return data.get("files", {})
+
+
+def group_duplicates(files: list) -> list:
+    """Group files with byte-identical content.
+    
+    Files are bucketed by a BLAKE2b digest and compared in full before being
+    grouped, so a hash collision never merges different files.
+    """
+    buckets = {}
+    for filepath in files:
+        content = filepath.read_bytes()
+        digest = hashlib.blake2b(content, digest_size=16).digest()
+        for first_content, group in buckets.setdefault(digest, []):
+            if first_content == content:
+                group.append(filepath)
+                break
+        else:
+            buckets[digest].append((content, [filepath]))
+    return [group for bucket in buckets.values() for _, group in bucket]
+
+
+def process_directory(executor, directory: Path, process_file, previous: dict,
+                      cache: dict, base_path: Path) -> tuple:
+    """Process all non-template YAML files in a directory.
+    
+    Files whose signature matches the previous run's cache are skipped without
+    being read. Signatures of files processed without error are recorded in
+    cache. Returns (changed, total) counts.
+    """
+    # Filter on the cached dirent names before building any Path objects
+    with os.scandir(directory) as entries:
+        files = [Path(entry.path) for entry in entries
+                 if entry.name.endswith(".yaml")
+                 and not entry.name.startswith("_")  # Skip templates
+                 and entry.is_file()]
+    
+    pending = []
+    for filepath in files:
+        key = str(filepath.relative_to(base_path))
+        signature = file_signature(filepath)
+        if previous.get(key) == signature:
+            cache[key] = signature
+        else:
+            pending.append(filepath)
+    
+    # Names resolving to the same file (symlinks) are processed once, so two
+    # workers never rewrite the same target concurrently
+    by_target = {}
+    for filepath in pending:
+        by_target.setdefault(filepath.resolve(), []).append(filepath)
+    aliases = {names[0]: names for names in by_target.values()}
+    unique = list(aliases)
+    
+    # Only process one file per set of identical contents
+    if len(unique) >= DEDUP_THRESHOLD:
+        groups = group_duplicates(unique)
+    else:
+        groups = [[filepath] for filepath in unique]
+    
+    representatives = [group[0] for group in groups]
+    results = list(executor.map(process_file, representatives, chunksize=8))
+    
+    changed = 0
+    for group, (status, error) in zip(groups, results):
+        for filepath in group:
+            if status == FAILED:
+                for name in aliases[filepath]:
+                    print(f"Error processing {name}: {error}")
+                continue
+            try:
+                if status == UPDATED and filepath is not group[0]:
+                    copy_file(group[0], filepath)
+                signature = file_signature(filepath)
+            except OSError as e:
+                for name in aliases[filepath]:
+                    print(f"Error processing {name}: {e}")
+                continue
+            for name in aliases[filepath]:
+                if status == UPDATED:
+                    changed += 1
+                    print(f"Updated: {name.name}")
+                cache[str(name.relative_to(base_path))] = signature
+    
+    return changed, len(files)
 
 
 def main():
     """Process all agent and pipeline files."""
     base_path = Path(__file__).parent
+    cache_path = base_path / CACHE_FILENAME
+    previous = load_cache(cache_path)
+    # Rebuilt from scratch so entries for deleted files are dropped
+    cache = {}
     
-    # Process agents
-    agents_dir = base_path / "agents"
-    if agents_dir.exists():
-        agent_count = 0
-        agent_changed = 0
-        for filepath in agents_dir.glob("*.yaml"):
-            if filepath.name.startswith("_"):
-                continue  # Skip templates
-            agent_count += 1
-            if process_agent_file(filepath):
-                agent_changed += 1
-                print(f"Updated: {filepath.name}")
+    # Files are independent, so parse/dump them across worker processes
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        # Process agents
+        agents_dir = base_path / "agents"
+        if agents_dir.exists():
+            changed, total = process_directory(
+                executor, agents_dir, process_agent_file, previous, cache, base_path)
+            print(f"\nAgents: {changed}/{total} updated")
         
-        print(f"\nAgents: {agent_changed}/{agent_count} updated")
+        # Process pipelines
+        pipelines_dir = base_path / "ai" / "pipelines"
+        if pipelines_dir.exists():
+            changed, total = process_directory(
+                executor, pipelines_dir, process_pipeline_file, previous, cache, base_path)
+            print(f"\nPipelines: {changed}/{total} updated")
     
-    # Process pipelines
-    pipelines_dir = base_path / "ai" / "pipelines"
-    if pipelines_dir.exists():
-        pipeline_count = 0
-        pipeline_changed = 0
-        for filepath in pipelines_dir.glob("*.yaml"):
-            if filepath.name.startswith("_"):
-                continue  # Skip templates
-            pipeline_count += 1
-            if process_pipeline_file(filepath):
-                pipeline_changed += 1
-                print(f"Updated: {filepath.name}")
-        
-        print(f"\nPipelines: {pipeline_changed}/{pipeline_count} updated")
+    with open(cache_path, 'w') as f:
+        json.dump({"rules": rules_key(), "files": cache}, f, indent=2, sort_keys=True)
 
 
 if __name__ == "__main__":